@@ -1,14 +1,29 @@
 import os
+import re
 import time
+import random
 import logging
 import shutil
 import argparse
+import configparser
+import json
+import hashlib
+import threading
+import queue
+import zipfile
+import xml.etree.ElementTree as ET
+import ijson
 import requests
-from msal import ConfidentialClientApplication
-from docx import Document
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from requests.auth import AuthBase
+from msal import ConfidentialClientApplication, SerializableTokenCache, TokenCache
 from logging.handlers import TimedRotatingFileHandler
-from urllib.parse import urlparse
-import json
+from urllib.parse import urlparse, quote
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
 
 def configure_logging(log_file_path=None):
     if log_file_path:
@@ -27,68 +42,250 @@ def configure_logging(log_file_path=None):
 
 logger = logging.getLogger(__name__)
 
-def get_access_token(client_id, client_secret, tenant_id):
+# Maximum number of mask API requests in flight at once, to stay within the API rate limits
+MASK_CONCURRENCY = 10
+# Maximum number of chunks sent in a single mask or status request
+MASK_BATCH_SIZE = 50
+# Maximum number of SharePoint files downloaded at once
+DOWNLOAD_CONCURRENCY = 8
+# Maximum number of chunks waiting to be submitted, and of submitted batches waiting to be polled
+SUBMIT_QUEUE_SIZE = 64
+POLL_QUEUE_SIZE = 256
+# Seconds the submission stage waits for more chunks before sending a partial batch
+SUBMIT_BATCH_WAIT = 0.05
+# Number of times a mask submission is retried after a connection error or a 5xx response
+MASK_SUBMIT_RETRIES = 3
+
+GRAPH_SCOPE = ["https://graph.microsoft.com/.default"]
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+GRAPH_HOST = urlparse(GRAPH_BASE_URL).netloc
+
+# XML namespace of the WordprocessingML elements in word/document.xml
+W_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+def create_msal_app(client_id, client_secret, tenant_id, token_cache_path=None):
+    """
+    Creates the MSAL client application. When token_cache_path is given, the token cache is loaded from it,
+    so a token acquired by a previous run is reused until it expires.
+    """
     authority = f"https://login.microsoftonline.com/{tenant_id}"
-    scope = ["https://graph.microsoft.com/.default"]
-    app = ConfidentialClientApplication(client_id, authority=authority, client_credential=client_secret)
-    token_result = app.acquire_token_for_client(scopes=scope)
+    token_cache = SerializableTokenCache()
+    if token_cache_path and os.path.exists(token_cache_path):
+        with open(token_cache_path, 'r') as f:
+            token_cache.deserialize(f.read())
+    return ConfidentialClientApplication(
+        client_id, authority=authority, client_credential=client_secret, token_cache=token_cache
+    )
+
+def save_token_cache(app, token_cache_path):
+    if not token_cache_path or not app.token_cache.has_state_changed:
+        return
+    cache_dir = os.path.dirname(token_cache_path)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    # The cache holds access tokens, so keep it readable by the current user only
+    fd = os.open(token_cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(app.token_cache.serialize())
+    logger.info(f"Saved token cache to {token_cache_path}")
+
+def get_access_token(app, refresh=False):
+    """
+    Returns a Graph access token, served from the MSAL token cache when possible.
+    With refresh=True, cached access tokens are dropped first so a new one is requested.
+    """
+    if refresh:
+        for access_token in list(app.token_cache.search(TokenCache.CredentialType.ACCESS_TOKEN, target=GRAPH_SCOPE)):
+            app.token_cache.remove_at(access_token)
+    token_result = app.acquire_token_for_client(scopes=GRAPH_SCOPE)
     if "access_token" not in token_result:
         raise Exception(f"Authentication failed: {token_result.get('error_description')}")
     return token_result["access_token"]
 
-def get_site_id(site_hostname, site_path, access_token):
-    url = f"https://graph.microsoft.com/v1.0/sites/{site_hostname}:{site_path}"
-    headers = {"Authorization": f"Bearer {access_token}"}
-    resp = requests.get(url, headers=headers)
-    resp.raise_for_status()
-    return resp.json()["id"]
-
-def list_files_in_folder(site_id, folder_name, access_token):
-    url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root:/{folder_name}:/children"
-    headers = {"Authorization": f"Bearer {access_token}"}
-    resp = requests.get(url, headers=headers)
-    resp.raise_for_status()
-    return resp.json()["value"]
-
-def download_file(site_id, item_id, local_path, access_token):
-    url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/items/{item_id}/content"
-    headers = {"Authorization": f"Bearer {access_token}"}
-    resp = requests.get(url, headers=headers, stream=True)
+class GraphTokenAuth(AuthBase):
+    """
+    Bearer authentication for Graph requests. When a request is rejected with 401, a new token is acquired
+    and the request is retried once.
+    Only 401s from the Graph host are retried, so the token is never sent to the pre-authenticated download
+    URLs that Graph redirects to.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.access_token = get_access_token(app)
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        request.headers["Authorization"] = f"Bearer {self.access_token}"
+        request.register_hook("response", self.retry_on_unauthorized)
+        return request
+
+    def retry_on_unauthorized(self, response, **kwargs):
+        if response.status_code != 401 or urlparse(response.request.url).netloc != GRAPH_HOST:
+            return response
+        with self.lock:
+            # Another thread may already have refreshed the token after this request was sent
+            if response.request.headers.get("Authorization") == f"Bearer {self.access_token}":
+                logger.info("Graph access token rejected, acquiring a new one")
+                self.access_token = get_access_token(self.app, refresh=True)
+        response.content
+        response.close()
+        retry_request = response.request.copy()
+        retry_request.headers["Authorization"] = f"Bearer {self.access_token}"
+        retry_response = response.connection.send(retry_request, **kwargs)
+        retry_response.history.append(response)
+        retry_response.request = retry_request
+        return retry_response
+
+def create_session(bearer_token=None, auth=None, pool_connections=10, pool_maxsize=50):
+    """
+    Creates a requests.Session carrying the bearer token (or auth handler), so that all calls against the same host
+    reuse pooled keep-alive connections instead of paying a new TCP/TLS handshake per request.
+    """
+    session = requests.Session()
+    if bearer_token:
+        session.headers["Authorization"] = f"Bearer {bearer_token}"
+    session.auth = auth
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def graph_batch(session, batch_requests, base=GRAPH_BASE_URL):
+    """
+    Sends up to 20 Graph requests in a single call to the $batch endpoint.
+    Returns the response bodies keyed by request id, raising if any request failed.
+    """
+    resp = session.post(f"{base}/$batch", json={"requests": batch_requests})
     resp.raise_for_status()
-    with open(local_path, "wb") as f:
-        for chunk in resp.iter_content(chunk_size=8192):
-            f.write(chunk)
-    logger.info(f"Downloaded {local_path}")
 
-def download_word_files_from_sharepoint_graph(site_hostname, site_path, folder_name, local_folder, client_id, client_secret, tenant_id):
-    logger.info(f"Authenticating and connecting to SharePoint site {site_hostname}{site_path}")
-    access_token = get_access_token(client_id, client_secret, tenant_id)
-    site_id = get_site_id(site_hostname, site_path, access_token)
-    files = list_files_in_folder(site_id, folder_name, access_token)
+    bodies = {}
+    for response in resp.json()["responses"]:
+        body = response.get("body", {})
+        if response["status"] >= 400:
+            error = body.get("error", {}) if isinstance(body, dict) else {}
+            raise requests.HTTPError(
+                f"Graph batch request {response['id']} failed with status {response['status']}: {error.get('message')}"
+            )
+        bodies[response["id"]] = body
+    return bodies
+
+@dataclass
+class GraphCtx:
+    """
+    Graph calls against the drive of one SharePoint site. The drive URLs are built once, and the session
+    already carries the authentication, so each call only appends the item-specific part.
+    """
+    session: requests.Session
+    site_id: str
+    base: str = GRAPH_BASE_URL
+
+    def __post_init__(self):
+        self.drive_url = f"{self.base}/sites/{self.site_id}/drive"
+        self.items_url = f"{self.drive_url}/items/"
+
+    def download(self, item_id, local_path):
+        with self.session.get(self.items_url + item_id + "/content", stream=True) as resp:
+            resp.raise_for_status()
+            # Copy the raw stream in 1 MiB blocks instead of iterating small chunks in Python
+            resp.raw.decode_content = True
+            with open(local_path, "wb") as f:
+                shutil.copyfileobj(resp.raw, f, length=1024 * 1024)
+        logger.info(f"Downloaded {local_path}")
+        return local_path
+
+    def list_changed_files(self, folder_id, delta_link=None):
+        """
+        Lists the files directly inside the folder that were added or changed since delta_link was issued,
+        or all of them when there is no delta_link.
+        Returns the files and the delta link to resume from on the next run.
+        Graph only supports delta queries on the drive root for SharePoint, so the whole drive is tracked
+        and the changes are filtered down to the folder. An item can appear more than once in a delta
+        response, so only its last entry counts.
+        """
+        url = delta_link or self.drive_url + "/root/delta"
+        files = {}
+        while True:
+            resp = self.session.get(url)
+            if resp.status_code == 410 and delta_link:
+                # The delta token expired, start over with a full enumeration
+                logger.warning("Delta link expired, listing all files again")
+                return self.list_changed_files(folder_id)
+            resp.raise_for_status()
+            page = resp.json()
+            for item in page["value"]:
+                # A later entry for the same item supersedes the earlier ones, including moves and deletes
+                if "deleted" in item or "file" not in item or item.get("parentReference", {}).get("id") != folder_id:
+                    files.pop(item["id"], None)
+                else:
+                    files[item["id"]] = item
+            if "@odata.nextLink" in page:
+                url = page["@odata.nextLink"]
+            else:
+                return list(files.values()), page["@odata.deltaLink"]
+
+def load_delta_state(state_path):
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path, 'r') as f:
+        return json.load(f)
+
+def save_delta_state(state_path, state):
+    state_dir = os.path.dirname(state_path)
+    if state_dir:
+        os.makedirs(state_dir, exist_ok=True)
+    with open(state_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    logger.info(f"Saved delta state to {state_path}")
+
+def download_word_files_from_sharepoint_graph(graph_session, site_hostname, site_path, folder_name, local_folder, state_path=None):
+    """
+    Downloads the .docx files of the SharePoint folder into local_folder.
+    When state_path is given, only files added or changed since the delta link saved there are downloaded.
+    Returns the downloaded paths and the updated delta state to save once the files are processed
+    (None when state_path is not given).
+    """
+    logger.info(f"Connecting to SharePoint site {site_hostname}{site_path}")
+    # Resolve the site and the folder in one round trip; the folder addresses the site by path,
+    # so it does not have to wait for the site id
+    site_ref = f"/sites/{site_hostname}:{site_path}"
+    # Sub-request URLs are sent as-is in the JSON body, so the folder path has to be percent-encoded here
+    folder_ref = f"{site_ref}:/drive/root:/{quote(folder_name)}:"
+    responses = graph_batch(graph_session, [
+        {"id": "site", "method": "GET", "url": site_ref},
+        # With delta tracking only the folder id is needed, otherwise list the folder right away
+        {"id": "folder", "method": "GET", "url": folder_ref if state_path else f"{folder_ref}/children"},
+    ])
+    graph = GraphCtx(graph_session, responses["site"]["id"])
+
+    delta_state = None
+    if state_path:
+        folder_id = responses["folder"]["id"]
+        delta_state = load_delta_state(state_path)
+        state_key = f"{graph.site_id}/{folder_id}"
+        files, delta_state[state_key] = graph.list_changed_files(folder_id, delta_state.get(state_key))
+    else:
+        files = responses["folder"]["value"]
 
     os.makedirs(local_folder, exist_ok=True)
-    downloaded_files = []
+    word_files = [file for file in files if file["name"].lower().endswith(".docx")]
 
-    for file in files:
-        if file["name"].endswith(".docx"):
-            local_path = os.path.join(local_folder, file["name"])
-            download_file(site_id, file["id"], local_path, access_token)
-            downloaded_files.append(local_path)
+    # Downloads are independent, so fetch them concurrently over the shared session
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_CONCURRENCY) as executor:
+        downloaded_files = list(executor.map(
+            lambda file: graph.download(file["id"], os.path.join(local_folder, file["name"])),
+            word_files
+        ))
 
-    return downloaded_files
+    return downloaded_files, delta_state
 
-def validate_mask_api(base_url, auth_key):
+def validate_mask_api(mask_session, base_url):
     test_payload = {
         "mask": [
             {"value": "Testing - Testing", "format": "Person Name", "token_name": "Text Token"}
         ]
     }
-    headers = {
-        'Authorization': f'Bearer {auth_key}',
-        'Content-Type': 'application/json',
-    }
     try:
-        response = requests.put(f"{base_url}/mask", headers=headers, json=test_payload)
+        response = mask_session.put(f"{base_url}/mask", json=test_payload)
         response.raise_for_status()
         data = response.json()
         if 'data' in data and isinstance(data['data'], list) and len(data['data']) > 0 and 'token_value' in data['data'][0]:
@@ -101,186 +298,479 @@ def validate_mask_api(base_url, auth_key):
         logger.error(f"Mask API validation failed: {e}")
         return False
 
-def call_mask_api(base_url, auth_key, mask_payload):
-    headers = {
-        'Authorization': f'Bearer {auth_key}',
-        'Content-Type': 'application/json',
-    }
-    response = requests.put(f"{base_url}/mask/async", headers=headers, json=mask_payload)
-    response.raise_for_status()
-    return response.json()
-
-def check_status(base_url, auth_key, tracking_id):
-    headers = {
-        'Authorization': f'Bearer {auth_key}',
-        'Content-Type': 'application/json',
-    }
+def call_mask_api(mask_session, base_url, mask_payload):
+    """
+    Submits values for async masking and returns their tracking IDs, in the order of the payload values.
+    The request carries an Idempotency-Key derived from the payload, so it is retried right away on connection
+    errors and 5xx responses (up to MASK_SUBMIT_RETRIES times) without the server masking the values twice.
+    """
+    payload_digest = hashlib.sha256(json.dumps(mask_payload, sort_keys=True).encode("utf-8")).hexdigest()
+    headers = {"Idempotency-Key": payload_digest}
+    for attempt in range(MASK_SUBMIT_RETRIES + 1):
+        try:
+            with mask_session.put(f"{base_url}/mask/async", json=mask_payload, headers=headers, stream=True) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                return list(ijson.items(response.raw, "data.item.tracking_id"))
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code < 500 or attempt == MASK_SUBMIT_RETRIES:
+                raise
+            error = e
+        except (requests.ConnectionError, ProtocolError, ReadTimeoutError) as e:
+            # The body is read from response.raw, so interrupted streams surface as urllib3 errors
+            if attempt == MASK_SUBMIT_RETRIES:
+                raise
+            error = e
+        logger.warning("Mask submission failed (%s), retrying (%d/%d)", error, attempt + 1, MASK_SUBMIT_RETRIES)
+
+def check_status(mask_session, base_url, tracking_ids):
     payload = {
-        "status": [{"tracking_id": tracking_id}]
+        "status": [{"tracking_id": tracking_id} for tracking_id in tracking_ids]
     }
-    response = requests.put(f"{base_url}/async-status", headers=headers, json=payload)
+    response = mask_session.put(f"{base_url}/async-status", json=payload, stream=True)
     response.raise_for_status()
-    return response.json()
+    return iter_status_items(response)
+
+def iter_status_items(response):
+    """
+    Streams the items of an async-status response with ijson instead of loading the whole body,
+    so the result arrays are never materialized. Yields one dict per item with its tracking_id,
+    status and masked_text (the concatenated token values of its result).
+    """
+    with response:
+        response.raw.decode_content = True
+        item = None
+        token_values = []
+        for prefix, event, value in ijson.parse(response.raw):
+            if prefix == "data.item" and event == "start_map":
+                item = {"tracking_id": None, "status": None, "masked_text": ""}
+                token_values = []
+            elif prefix == "data.item" and event == "end_map":
+                item["masked_text"] = "".join(token_values)
+                yield item
+            elif prefix == "data.item.tracking_id":
+                item["tracking_id"] = value
+            elif prefix == "data.item.status":
+                item["status"] = value
+            elif prefix == "data.item.result.item.token_value" and value is not None:
+                token_values.append(value)
+
+def paragraph_text(paragraph):
+    """
+    Returns the text of a w:p element the way python-docx renders it: only the runs that are direct children
+    of the paragraph or of its hyperlinks are read, so text boxes, nested paragraphs and tracked insertions
+    are skipped. Tabs and line breaks are kept as whitespace.
+    """
+    runs = []
+    for child in paragraph:
+        if child.tag == f"{W_NAMESPACE}r":
+            runs.append(child)
+        elif child.tag == f"{W_NAMESPACE}hyperlink":
+            runs.extend(child.findall(f"{W_NAMESPACE}r"))
+
+    parts = []
+    for elem in (run_child for run in runs for run_child in run):
+        if elem.tag == f"{W_NAMESPACE}t":
+            parts.append(elem.text or "")
+        elif elem.tag in (f"{W_NAMESPACE}tab", f"{W_NAMESPACE}ptab"):
+            parts.append("\t")
+        elif elem.tag == f"{W_NAMESPACE}cr":
+            parts.append("\n")
+        elif elem.tag == f"{W_NAMESPACE}br" and elem.get(f"{W_NAMESPACE}type", "textWrapping") == "textWrapping":
+            parts.append("\n")
+        elif elem.tag == f"{W_NAMESPACE}noBreakHyphen":
+            parts.append("-")
+    return "".join(parts)
+
+def iter_docx_paragraphs(word_path):
+    """
+    Yields the text of each top-level paragraph of a .docx file.
+    word/document.xml is streamed with iterparse and each body element is dropped once read,
+    so the whole document tree is never held in memory.
+    """
+    body_tag = f"{W_NAMESPACE}body"
+    with zipfile.ZipFile(word_path) as archive, archive.open("word/document.xml") as document_xml:
+        body = None
+        depth = 0
+        for event, elem in ET.iterparse(document_xml, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if elem.tag == body_tag:
+                    body, body_depth = elem, depth
+                continue
+
+            depth -= 1
+            if body is not None and depth == body_depth:
+                # Direct child of w:body: a paragraph, table or section properties
+                if elem.tag == f"{W_NAMESPACE}p":
+                    yield paragraph_text(elem)
+                body.remove(elem)
 
 def split_text_into_chunks(text, max_words=500):
-    words = text.split()
-    chunks = []
-    for i in range(0, len(words), max_words):
-        chunk = " ".join(words[i:i + max_words])
-        chunks.append(chunk)
-    return chunks
+    """
+    Yields chunks of at most max_words words, scanning the text word by word instead of splitting it all at once.
+    """
+    words = []
+    for match in re.finditer(r"\S+", text):
+        words.append(match.group())
+        if len(words) == max_words:
+            yield " ".join(words)
+            words = []
+    if words:
+        yield " ".join(words)
+
+def submit_batch(mask_session, base_url, chunk_texts):
+    """
+    Sends a batch of chunks in a single mask API request.
+    Returns the tracking IDs in the same order as chunk_texts.
+    """
+    mask_payload = {"mask": [{"value": chunk_text} for chunk_text in chunk_texts]}
+    tracking_ids = call_mask_api(mask_session, base_url, mask_payload)
+    if len(tracking_ids) != len(chunk_texts):
+        raise Exception(f"Mask API returned {len(tracking_ids)} tracking IDs for {len(chunk_texts)} chunks")
+    return tracking_ids
+
+def parse_retry_after(response):
+    """
+    Returns the number of seconds requested by a Retry-After header, or None if the header is missing or invalid.
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def backoff_delay(attempt, base, cap):
+    return min(cap, base * 2 ** attempt) + random.uniform(0, base)
+
+def poll_with_backoff(mask_session, base_url, tracking_ids, chunk_texts, base=0.5, cap=10):
+    """
+    Polls the status of a batch of masking requests until all of them complete.
+    Returns the masked texts in the same order as tracking_ids, falling back to the original chunk text
+    for any chunk whose masking fails.
+    Waits between polls grow exponentially with jitter, starting at base and capped at cap seconds, and are
+    reset whenever a chunk completes. When the API is rate limited, its Retry-After header is honored.
+    A chunk's status is only logged when it changes, not on every poll.
+    """
+    chunk_by_tracking_id = dict(zip(tracking_ids, chunk_texts))
+    masked_by_tracking_id = {}
+    last_status = {}
+    attempt = 0
+
+    while True:
+        pending_ids = [tracking_id for tracking_id in tracking_ids if tracking_id not in masked_by_tracking_id]
+        try:
+            status_items = check_status(mask_session, base_url, pending_ids)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code not in (429, 503):
+                raise
+            delay = parse_retry_after(e.response)
+            if delay is None:
+                delay = backoff_delay(attempt, base, cap)
+            attempt += 1
+            logger.warning("Mask status API throttled (HTTP %s), retrying in %.1fs", e.response.status_code, delay)
+            time.sleep(delay)
+            continue
+
+        completed_before = len(masked_by_tracking_id)
+        for polled_id, item in zip(pending_ids, status_items):
+            tracking_id = item['tracking_id'] or polled_id
+            status = item['status']
+            if last_status.get(tracking_id) != status:
+                last_status[tracking_id] = status
+                logger.info("Masking status for tracking ID %s: %s", tracking_id, status)
+            if status == 'SUCCESS':
+                masked_by_tracking_id[tracking_id] = item['masked_text'].strip()
+            elif status not in ['IN-PROGRESS', 'PENDING']:
+                logger.warning("Masking failed or unknown status '%s' for tracking ID %s", status, tracking_id)
+                # fallback: write original chunk text if masking fails
+                masked_by_tracking_id[tracking_id] = chunk_by_tracking_id[tracking_id]
+
+        if len(masked_by_tracking_id) == len(tracking_ids):
+            return [masked_by_tracking_id[tracking_id] for tracking_id in tracking_ids]
+        if len(masked_by_tracking_id) > completed_before:
+            attempt = 0
+        time.sleep(backoff_delay(attempt, base, cap))
+        attempt += 1
+
+def iter_paragraph_chunks(word_path, word_limit):
+    """
+    Yields (paragraph_index, chunk_text) tuples for a Word file, splitting paragraphs into chunks
+    of max word_limit words. Blank paragraphs yield a single empty chunk to preserve blank lines.
+    """
+    for idx, text in enumerate(iter_docx_paragraphs(word_path)):
+        text = text.strip()
+        if not text:
+            yield idx, ""
+            continue
+        for chunk in split_text_into_chunks(text, max_words=word_limit):
+            yield idx, chunk
+
+def drain_queue(stage_queue):
+    """
+    Discards items until the end-of-stage marker, so an upstream stage blocked on a full queue can finish.
+    """
+    while stage_queue.get() is not None:
+        pass
+
+def extract_stage(word_path, word_limit, submit_queue, cancelled):
+    """
+    First pipeline stage: reads paragraph chunks from the Word file into submit_queue.
+    Stops early once cancelled is set.
+    """
+    try:
+        for paragraph_chunk in iter_paragraph_chunks(word_path, word_limit):
+            if cancelled.is_set():
+                break
+            submit_queue.put(paragraph_chunk)
+    finally:
+        submit_queue.put(None)
+
+def submit_stage(mask_session, base_url, executor, submit_queue, poll_queue, cancelled):
+    """
+    Second pipeline stage: groups chunks from submit_queue into batches and submits them to the mask API
+    on executor, so the requests of several batches overlap.
+    A batch is sent once it holds MASK_BATCH_SIZE non-empty chunks, or when no further chunk arrives
+    within SUBMIT_BATCH_WAIT seconds.
+    Each batch is put on poll_queue in chunk order as a (chunks, future) tuple, where chunks is the list of
+    (paragraph_index, chunk_text) tuples and future resolves to the tracking IDs of its non-empty chunks.
+    Empty chunks are not sent; a batch holding only empty chunks has no future.
+    Once cancelled is set, the remaining chunks are discarded without being sent.
+    """
+    batch = []
+    batch_size = 0
+    finished = False
+
+    def flush():
+        chunk_texts = [chunk_text for para_idx, chunk_text in batch if chunk_text]
+        future = executor.submit(submit_batch, mask_session, base_url, chunk_texts) if chunk_texts else None
+        poll_queue.put((batch, future))
+
+    try:
+        while not finished:
+            try:
+                # Only wait indefinitely for the next chunk when there is nothing to send in the meantime
+                paragraph_chunk = submit_queue.get(timeout=SUBMIT_BATCH_WAIT if batch else None)
+            except queue.Empty:
+                # Extraction is lagging, so send the partial batch
+                paragraph_chunk = False
+
+            if paragraph_chunk is None:
+                finished = True
+            elif paragraph_chunk:
+                batch.append(paragraph_chunk)
+                if paragraph_chunk[1]:
+                    batch_size += 1
+                if batch_size < MASK_BATCH_SIZE:
+                    continue
 
-def process_word_files(base_url, auth_key, word_file_paths, output_dir, word_limit=500, archive_dir=None):
+            if cancelled.is_set():
+                # The poll stage failed, so stop sending the rest of the document
+                if not finished:
+                    drain_queue(submit_queue)
+                return
+            if batch:
+                flush()
+                batch = []
+                batch_size = 0
+    except Exception:
+        if not finished:
+            drain_queue(submit_queue)
+        raise
+    finally:
+        poll_queue.put(None)
+
+def poll_stage(mask_session, base_url, executor, poll_queue, cancelled):
+    """
+    Last pipeline stage: waits for each batch from poll_queue to be submitted, in order, and polls
+    the batches concurrently on executor.
+    Returns the output text of every chunk in chunk order, each masked chunk followed by a paragraph break
+    and each empty chunk as a blank line.
+    If a batch fails, sets cancelled to stop the upstream stages and cancels the submit and poll requests
+    that have not started yet, so they do not hold up the shared executor for the next file.
+    """
+    polling = []  # (batch, future) in submission order
+    finished = False
+    try:
+        while True:
+            submitted = poll_queue.get()
+            if submitted is None:
+                finished = True
+                break
+            batch, submit_future = submitted
+            future = None
+            if submit_future:
+                chunk_texts = [chunk_text for para_idx, chunk_text in batch if chunk_text]
+                future = executor.submit(poll_with_backoff, mask_session, base_url, submit_future.result(), chunk_texts)
+            polling.append((batch, future))
+
+        out = []
+        log_chunks = logger.isEnabledFor(logging.DEBUG)
+        for batch, future in polling:
+            masked_texts = iter(future.result() if future else [])
+            for para_idx, chunk_text in batch:
+                if not chunk_text:
+                    # Empty paragraph chunk - blank line
+                    out.append("\n")
+                    continue
+                out.append(next(masked_texts) + "\n\n")  # Paragraph break between chunks
+                if log_chunks:
+                    logger.debug("Masked chunk %d (paragraph %d)", len(out), para_idx + 1)
+        return out
+    except Exception:
+        cancelled.set()
+        for batch, future in polling:
+            if future:
+                future.cancel()
+        while not finished:
+            submitted = poll_queue.get()
+            if submitted is None:
+                finished = True
+            elif submitted[1]:
+                submitted[1].cancel()
+        raise
+
+def process_word_files(mask_session, base_url, word_file_paths, output_dir, word_limit=500, archive_dir=None):
     """
     Processes each word file paragraph-wise with masking, splitting paragraphs longer than word_limit into chunks,
     preserving paragraph order and paragraph breaks.
     The word_limit applies per paragraph, not globally.
+    Each file runs through a three stage pipeline: paragraph extraction, batched submission to the mask API
+    (MASK_BATCH_SIZE chunks per request) and status polling, so reading the document overlaps with the network calls.
+    Batches are submitted and polled concurrently, up to MASK_CONCURRENCY requests at a time.
+    Returns the paths of the files that could not be processed.
     """
-    for word_path in word_file_paths:
-        logger.info(f"Processing Word file: {word_path}")
-        try:
-            doc = Document(word_path)
+    os.makedirs(output_dir, exist_ok=True)
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
 
-            output_txt_path = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(word_path))[0]}_masked_output.txt")
-            os.makedirs(output_dir, exist_ok=True)
-            # Clean output file before writing
-            open(output_txt_path, 'w', encoding='utf-8').close()
+    failed_files = []
+    with ThreadPoolExecutor(max_workers=MASK_CONCURRENCY) as executor:
+        for word_path in word_file_paths:
+            if not process_word_file(mask_session, base_url, executor, word_path, output_dir, word_limit, archive_dir):
+                failed_files.append(word_path)
+    return failed_files
 
-            paragraph_chunks = []  # Will store tuples (original_paragraph_index, chunk_text)
+def process_word_file(mask_session, base_url, executor, word_path, output_dir, word_limit=500, archive_dir=None):
+    """
+    Masks a single Word file and writes the masked text to output_dir, then archives or deletes it.
+    Returns False if the file could not be processed.
+    """
+    logger.info(f"Processing Word file: {word_path}")
+    try:
+        output_txt_path = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(word_path))[0]}_masked_output.txt")
 
-            # Split paragraphs into chunks with max word_limit words per chunk
-            for idx, para in enumerate(doc.paragraphs):
-                text = para.text.strip()
-                if not text:
-                    # Preserve blank lines as empty paragraph chunks
-                    paragraph_chunks.append((idx, ""))
-                    continue
+        submit_queue = queue.Queue(maxsize=SUBMIT_QUEUE_SIZE)
+        poll_queue = queue.Queue(maxsize=POLL_QUEUE_SIZE)
 
-                # Split paragraph into chunks of max word_limit words
-                para_chunks = split_text_into_chunks(text, max_words=word_limit)
+        # Set by the poll stage on failure so the other stages stop early
+        cancelled = threading.Event()
 
-                # Add these chunks with paragraph index for order preservation
-                for chunk in para_chunks:
-                    paragraph_chunks.append((idx, chunk))
+        with ThreadPoolExecutor(max_workers=2) as stages:
+            extract_future = stages.submit(extract_stage, word_path, word_limit, submit_queue, cancelled)
+            submit_future = stages.submit(submit_stage, mask_session, base_url, executor, submit_queue, poll_queue, cancelled)
+            out = poll_stage(mask_session, base_url, executor, poll_queue, cancelled)
+            # Surface any error raised by the extraction or submission stage
+            extract_future.result()
+            submit_future.result()
 
-            if not paragraph_chunks:
-                logger.warning(f"No text paragraphs to process in {word_path}")
-                continue
+        if not out:
+            logger.warning(f"No text paragraphs to process in {word_path}")
+            return True
 
-            # For each chunk, send mask API request async, collect tracking IDs
-            tracking_ids = []
-            for idx, (para_idx, chunk_text) in enumerate(paragraph_chunks):
-                if not chunk_text.strip():
-                    # Empty paragraph chunk: add dummy tracking id to preserve order and write blank line later
-                    tracking_ids.append(None)
-                    continue
-                mask_payload = {"mask": [{"value": chunk_text}]}
-                mask_response = call_mask_api(base_url, auth_key, mask_payload)
-                tracking_id = mask_response['data'][0]['tracking_id']
-                tracking_ids.append(tracking_id)
-
-            # Now poll status for each tracking id and write output preserving paragraph chunk order
-            with open(output_txt_path, 'w', encoding='utf-8') as f_out:
-                for idx, tracking_id in enumerate(tracking_ids):
-                    para_idx, chunk_text = paragraph_chunks[idx]
-                    if tracking_id is None:
-                        # Empty paragraph chunk - write blank line
-                        f_out.write("\n")
-                        continue
-
-                    while True:
-                        status_response = check_status(base_url, auth_key, tracking_id)
-                        logger.info(f"Masking status for tracking ID {tracking_id}: {json.dumps(status_response, indent=2)}")
-
-                        status = status_response['data'][0]['status']
-                        if status == 'SUCCESS':
-                            result = status_response['data'][0]['result']
-                            masked_text = ""
-                            for res in result:
-                                masked_text += res.get("token_value", "")
-                            f_out.write(masked_text.strip() + "\n\n")  # Paragraph break between chunks
-                            logger.info(f"Wrote masked chunk {idx+1} (paragraph {para_idx+1})")
-                            break
-                        elif status in ['IN-PROGRESS', 'PENDING']:
-                            logger.info(f"Waiting for masking completion for tracking ID {tracking_id} (status: {status})")
-                            time.sleep(3)
-                        else:
-                            logger.warning(f"Masking failed or unknown status '{status}' for tracking ID {tracking_id}")
-                            # fallback: write original chunk text if masking fails
-                            f_out.write(chunk_text + "\n\n")
-                            break
-
-            if archive_dir:
-                os.makedirs(archive_dir, exist_ok=True)
-                shutil.move(word_path, os.path.join(archive_dir, os.path.basename(word_path)))
-                logger.info(f"Archived {os.path.basename(word_path)} to {archive_dir}")
-            else:
-                os.remove(word_path)
-                logger.info(f"Deleted processed file: {word_path}")
+        # Write the whole output at once, preserving paragraph chunk order
+        with open(output_txt_path, 'w', encoding='utf-8') as f_out:
+            f_out.write("".join(out))
+
+        if archive_dir:
+            archive_path = os.path.join(archive_dir, os.path.basename(word_path))
+            try:
+                # A plain rename when both folders are on the same filesystem
+                os.replace(word_path, archive_path)
+            except OSError:
+                shutil.move(word_path, archive_path)
+            logger.info(f"Archived {os.path.basename(word_path)} to {archive_dir}")
+        else:
+            os.remove(word_path)
+            logger.info(f"Deleted processed file: {word_path}")
+        return True
 
-        except Exception as e:
-            logger.error(f"Error processing file {word_path}: {e}")
+    except Exception as e:
+        logger.error(f"Error processing file {word_path}: {e}")
+        return False
 
-def main(config_path, sharepoint_folder, local_download_dir, output_dir, log_file_path, word_limit, archive_dir=None):
+def main(config_path, sharepoint_folder, local_download_dir, output_dir, log_file_path, word_limit, archive_dir=None, token_cache_path=None, state_path=None):
     configure_logging(log_file_path)
 
-    config = {}
+    # Accept both ':' and '=' as separators; keys stay case-sensitive and may be quoted
+    config = configparser.ConfigParser(delimiters=(':', '='), interpolation=None, strict=False, allow_no_value=True)
+    config.optionxform = lambda option: option.strip('"')
     try:
         with open(config_path, 'r') as f:
-            section = None
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):  # skip empty or commented lines
-                    continue
-                if line.startswith('[') and line.endswith(']'):
-                    section = line[1:-1]
-                    config[section] = {}
-                elif section:
-                    # Try both ':' and '=' as separators
-                    if ':' in line:
-                        key, value = line.split(':', 1)
-                    elif '=' in line:
-                        key, value = line.split('=', 1)
-                    else:
-                        continue  # Skip lines without valid key-value delimiter
-                    config[section][key.strip().strip('"')] = value.strip().strip('"')
+            config.read_file(f)
     except Exception as e:
         logger.error(f"Error reading config file: {e}")
         return
-    if 'protecto' not in config:
+    if not config.has_section('protecto'):
         logger.error("Config missing 'protecto' section")
         return
 
-    base_url = config['protecto'].get('BASE_URL')
-    auth_key = config['protecto'].get('AUTH_KEY')
-    client_id = config['protecto'].get('CLIENT_ID')
-    client_secret = config['protecto'].get('CLIENT_SECRET')
-    site_url = config['protecto'].get('SITE_URL')
-    tenant_id = config['protecto'].get('TENANT_ID')
+    protecto = {key: value.strip('"') for key, value in config['protecto'].items() if value is not None}
+    base_url = protecto.get('BASE_URL')
+    auth_key = protecto.get('AUTH_KEY')
+    client_id = protecto.get('CLIENT_ID')
+    client_secret = protecto.get('CLIENT_SECRET')
+    site_url = protecto.get('SITE_URL')
+    tenant_id = protecto.get('TENANT_ID')
 
     if not all([base_url, auth_key, client_id, client_secret, site_url, tenant_id]):
         logger.error("Missing required configuration values")
         return
 
-    if not validate_mask_api(base_url, auth_key):
-        logger.error("Mask API validation failed. Exiting.")
-        return
-
-    parsed_url = urlparse(site_url)
-    site_hostname = parsed_url.netloc
-    site_path = parsed_url.path
+    with create_session(auth_key) as mask_session:
+        mask_session.headers["Content-Type"] = "application/json"
 
-    word_files = download_word_files_from_sharepoint_graph(
-        site_hostname, site_path, sharepoint_folder,
-        local_download_dir, client_id, client_secret, tenant_id
-    )
+        if not validate_mask_api(mask_session, base_url):
+            logger.error("Mask API validation failed. Exiting.")
+            return
 
-    if not word_files:
-        logger.warning("No Word files found on SharePoint folder")
-        return
+        parsed_url = urlparse(site_url)
+        site_hostname = parsed_url.netloc
+        site_path = parsed_url.path
 
-    os.makedirs(output_dir, exist_ok=True)
-    process_word_files(base_url, auth_key, word_files, output_dir, word_limit, archive_dir)
+        logger.info("Authenticating with Microsoft Graph")
+        app = create_msal_app(client_id, client_secret, tenant_id, token_cache_path)
+        try:
+            with create_session(auth=GraphTokenAuth(app)) as graph_session:
+                word_files, delta_state = download_word_files_from_sharepoint_graph(
+                    graph_session, site_hostname, site_path, sharepoint_folder, local_download_dir, state_path
+                )
+        finally:
+            save_token_cache(app, token_cache_path)
+
+        if not word_files:
+            logger.warning("No Word files found on SharePoint folder")
+            if delta_state is not None:
+                save_delta_state(state_path, delta_state)
+            return
+
+        failed_files = process_word_files(mask_session, base_url, word_files, output_dir, word_limit, archive_dir)
+
+        if delta_state is not None:
+            if failed_files:
+                # Keep the previous delta link so the failed files are fetched again on the next run
+                logger.warning(f"{len(failed_files)} file(s) failed, delta state not updated")
+            else:
+                save_delta_state(state_path, delta_state)
 
     logger.info("Word document masking completed.")
 
@@ -293,6 +783,8 @@ if __name__ == "__main__":
     parser.add_argument("--log_file_path", required=False, help="Optional log file path")
     parser.add_argument("--archive_dir", required=False, help="Optional folder to archive processed Word files")
     parser.add_argument("--word_limit", required=False, type=int, default=500, help="Maximum words per paragraph chunk (default 500)")
+    parser.add_argument("--token_cache_path", required=False, help="Optional file to persist the Graph token cache between runs")
+    parser.add_argument("--state_path", required=False, help="Optional JSON file to keep the Graph delta link, so later runs only download new or changed files")
 
     args = parser.parse_args()
 
@@ -304,4 +796,6 @@ if __name__ == "__main__":
         log_file_path=args.log_file_path,
         word_limit=args.word_limit,
         archive_dir=args.archive_dir,
+        token_cache_path=args.token_cache_path,
+        state_path=args.state_path,
     )